@@ -0,0 +1,521 @@
+"""Generate a synthetic corpus of citation-bearing text for load testing.
+
+Citations are sampled from the expanded regexes in reporters_db.patterns,
+so they cover every edition and variation in the requested part of the
+database, and their years fall within the edition's date range. Citations
+whose volume is a year (neutral, LEXIS and Westlaw citations) or that have
+a year group of their own get the year in place; other reporter citations
+are followed by the year in parentheses. Each document comes with
+ground-truth annotations giving the offsets and matched groups of every
+citation in it.
+
+Output is reproducible for a given seed, database version and Python
+version, and is generated one document at a time, so corpora of any size
+can be written with bounded memory:
+
+    python -m reporters_db.corpus --seed 1 --documents 100000 > corpus.jsonl
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+
+from reporters_db import JOURNALS, LAWS, REPORTERS
+from reporters_db.patterns import get_regexes
+
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:
+    # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+# Characters used to fill in ".", negated classes and categories
+ALPHABET = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .,-'&()"
+)
+CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: "0123456789",
+    sre_constants.CATEGORY_NOT_DIGIT: ALPHABET.translate(
+        {ord(c): None for c in "0123456789"}
+    ),
+    sre_constants.CATEGORY_SPACE: " ",
+    sre_constants.CATEGORY_NOT_SPACE: ALPHABET.replace(" ", ""),
+    sre_constants.CATEGORY_WORD: "".join(c for c in ALPHABET if c.isalnum()),
+    sre_constants.CATEGORY_NOT_WORD: " .,-'&()",
+}
+
+WORDS = (
+    "the",
+    "court",
+    "held",
+    "that",
+    "plaintiff",
+    "defendant",
+    "appeal",
+    "motion",
+    "judgment",
+    "trial",
+    "evidence",
+    "statute",
+    "claim",
+    "record",
+    "order",
+    "jury",
+    "district",
+    "opinion",
+    "argument",
+    "contract",
+    "damages",
+    "reversed",
+    "affirmed",
+    "remanded",
+    "under",
+    "section",
+    "finding",
+    "whether",
+    "because",
+    "however",
+    "therefore",
+    "party",
+    "counsel",
+    "filed",
+    "petition",
+    "review",
+    "standard",
+    "error",
+    "law",
+    "question",
+    "issue",
+    "relief",
+    "rule",
+    "analysis",
+)
+
+TEMPLATES = (
+    "See {cite}.",
+    "See, e.g., {cite}.",
+    "{words} {cite}.",
+    "As explained in {cite}, {words}.",
+    "{words}; {cite}.",
+    "Cf. {cite} ({words}).",
+)
+
+
+def _latest_year():
+    """The latest year mentioned anywhere in the database, used as the end
+    of open-ended date ranges so that output doesn't depend on today's date.
+    """
+    years = [
+        d.year
+        for data in (LAWS, JOURNALS)
+        for entries in data.values()
+        for entry in entries
+        for d in (entry["start"], entry["end"])
+        if d is not None
+    ]
+    years.extend(
+        d.year
+        for entries in REPORTERS.values()
+        for entry in entries
+        for edition in entry["editions"].values()
+        for d in (edition["start"], edition["end"])
+        if d is not None
+    )
+    return max(years)
+
+
+LATEST_YEAR = _latest_year()
+# Used as the start of date ranges that don't have one, following the
+# convention in reporters.json for unknown start dates
+EARLIEST_YEAR = 1750
+
+# Citations whose volume is the year of decision
+YEAR_VOLUME_CITE_TYPES = ("neutral", "specialty_lexis", "specialty_west")
+YEAR_VOLUME_EDITION_SUFFIXES = ("LEXIS", "WL")
+
+
+def sample_regex(parsed, rng, max_repeat=3, groups=None, overrides=None):
+    """Return a random string matching a regex parsed with sre_parse.
+
+    Unbounded repeats like * and + are repeated at most max_repeat times
+    beyond their minimum. overrides maps group numbers to fixed text to use
+    for those groups. Raises ValueError for regex features that can't be
+    sampled.
+    """
+    if groups is None:
+        groups = {}
+    if overrides is None:
+        overrides = {}
+    out = []
+    for op, av in parsed:
+        if op == sre_constants.LITERAL:
+            out.append(chr(av))
+        elif op == sre_constants.NOT_LITERAL:
+            out.append(rng.choice(ALPHABET.replace(chr(av), "")))
+        elif op == sre_constants.ANY:
+            out.append(rng.choice(ALPHABET))
+        elif op == sre_constants.IN:
+            out.append(_sample_in(av, rng))
+        elif op == sre_constants.BRANCH:
+            out.append(
+                sample_regex(
+                    rng.choice(av[1]), rng, max_repeat, groups, overrides
+                )
+            )
+        elif op == sre_constants.SUBPATTERN:
+            group, _add_flags, _del_flags, subpattern = av
+            if group in overrides:
+                text = overrides[group]
+            else:
+                text = sample_regex(
+                    subpattern, rng, max_repeat, groups, overrides
+                )
+            if group is not None:
+                groups[group] = text
+            out.append(text)
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, high, subpattern = av
+            high = min(high, low + max_repeat)
+            for _ in range(rng.randint(low, high)):
+                out.append(
+                    sample_regex(
+                        subpattern, rng, max_repeat, groups, overrides
+                    )
+                )
+        elif op == sre_constants.GROUPREF:
+            out.append(groups.get(av, ""))
+        elif op in (
+            sre_constants.AT,
+            sre_constants.ASSERT,
+            sre_constants.ASSERT_NOT,
+        ):
+            # Zero-width; the result is checked against the regex afterwards
+            continue
+        else:
+            raise ValueError(f"Can't sample regex opcode {op}")
+    return "".join(out)
+
+
+def _sample_in(items, rng):
+    """Return a random character from a character class."""
+    if items and items[0][0] == sre_constants.NEGATE:
+        excluded = set()
+        for op, av in items[1:]:
+            if op == sre_constants.LITERAL:
+                excluded.add(chr(av))
+            elif op == sre_constants.RANGE:
+                excluded.update(chr(c) for c in range(av[0], av[1] + 1))
+            elif op == sre_constants.CATEGORY:
+                excluded.update(CATEGORIES.get(av, ""))
+        return rng.choice([c for c in ALPHABET if c not in excluded])
+    op, av = rng.choice(items)
+    if op == sre_constants.LITERAL:
+        return chr(av)
+    if op == sre_constants.RANGE:
+        return chr(rng.randint(av[0], av[1]))
+    if op == sre_constants.CATEGORY and av in CATEGORIES:
+        return rng.choice(CATEGORIES[av])
+    raise ValueError(f"Can't sample character class item {op}")
+
+
+def sample_citation(
+    citation_regex, rng, parsed=None, max_tries=10, overrides=None
+):
+    """Return a random citation matching citation_regex, a CitationRegex
+    from get_regexes, as a match object, or None if no match was found
+    in max_tries attempts. parsed may be passed in to avoid re-parsing
+    the regex. overrides maps group names to fixed text for those groups.
+    """
+    regex = citation_regex.regex
+    if parsed is None:
+        parsed = sre_parse.parse(regex.pattern)
+    overrides = overrides or {}
+    group_overrides = {regex.groupindex[k]: v for k, v in overrides.items()}
+    for _ in range(max_tries):
+        m = regex.fullmatch(
+            sample_regex(parsed, rng, overrides=group_overrides)
+        )
+        if m and all(m.group(k) == v for k, v in overrides.items()):
+            return m
+    return None
+
+
+def group_pattern(pattern, name):
+    """Return the source of the named group in a regex pattern, or None if
+    it has no such group.
+    """
+    start = pattern.find(f"(?P<{name}>")
+    if start == -1:
+        return None
+    start += len(f"(?P<{name}>")
+    depth = 0
+    in_class = False
+    i = start
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 1
+        elif in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            if depth == 0:
+                return pattern[start:i]
+            depth -= 1
+        i += 1
+    return None
+
+
+def year_volume_pattern(citation_regex):
+    """Return the compiled volume group of citation_regex if the volume is
+    a year, as in neutral citations like "2017 IL App (3d) 123456" or
+    LEXIS and Westlaw citations like "2007 Iowa App. LEXIS 9", or None
+    otherwise. A volume counts as a year if the citation is one of those
+    kinds, or if it can match a year but not ordinary volume numbers.
+    """
+    volume = group_pattern(citation_regex.regex.pattern, "volume")
+    if volume is None:
+        return None
+    volume = re.compile(volume)
+    if citation_regex.cite_type in YEAR_VOLUME_CITE_TYPES or (
+        citation_regex.edition.endswith(YEAR_VOLUME_EDITION_SUFFIXES)
+    ):
+        return volume
+    if any(volume.fullmatch(v) for v in ("5", "123", "5000")):
+        return None
+    if not any(volume.fullmatch(str(y)) for y in (1850, 1950, 2000)):
+        return None
+    return volume
+
+
+def year_range(citation_regex):
+    """Return the first and last year of citation_regex's date range,
+    filling in unknown dates with EARLIEST_YEAR and LATEST_YEAR.
+    """
+    start = citation_regex.start.year if citation_regex.start else None
+    end = citation_regex.end.year if citation_regex.end else None
+    start = start or EARLIEST_YEAR
+    return start, max(start, end or LATEST_YEAR)
+
+
+def sample_year(citation_regex, rng):
+    """Return a random year within the date range of citation_regex, or
+    None if it has no start date.
+    """
+    if citation_regex.start is None:
+        return None
+    return rng.randint(*year_range(citation_regex))
+
+
+def filler(rng, low=4, high=12):
+    """Return some random words."""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def prepare(citation_regex):
+    """Parse citation_regex for sampling.
+
+    Returns (parsed, year_groups, years). year_groups names the groups
+    that hold the citation's year: a "year" group, and "volume" if the
+    volume is a year. years lists the years in the date range that all of
+    those groups can match, or is None if there are no year groups.
+    Returns None if the year groups can't match any year in the date range.
+    """
+    pattern = citation_regex.regex.pattern
+    parsed = sre_parse.parse(pattern)
+    year_patterns = {}
+    volume = year_volume_pattern(citation_regex)
+    if volume is not None:
+        year_patterns["volume"] = volume
+    if "year" in citation_regex.regex.groupindex:
+        year_patterns["year"] = re.compile(group_pattern(pattern, "year"))
+    if not year_patterns:
+        return parsed, (), None
+    start, end = year_range(citation_regex)
+    years = [
+        y
+        for y in range(start, end + 1)
+        if all(p.fullmatch(str(y)) for p in year_patterns.values())
+    ]
+    if not years:
+        return None
+    return parsed, tuple(year_patterns), years
+
+
+def generate_corpus(
+    seed=0,
+    documents=1000,
+    citations_per_document=(1, 10),
+    sources=None,
+    jurisdictions=None,
+    cite_types=None,
+):
+    """Yield synthetic documents with ground-truth citation annotations.
+
+    Each document is a dict of the form:
+        {
+         "id": 0,
+         "text": "See 123 A.2d 456 (1952). The court held ...",
+         "citations": [
+             {
+              "start": 4,
+              "end": 16,
+              "text": "123 A.2d 456",
+              "source": "reporters",
+              "key": "A.",
+              "edition": "A.2d",
+              "template": "$full_cite",
+              "groups": {"volume": "123", "reporter": "A.2d", "page": "456"},
+              "year": 1952,
+             },
+             ...
+         ],
+        }
+
+    start and end are offsets into text of the citation itself, without
+    any year parenthetical. year is set for reporter citations with a date
+    range, which are followed by the year in parentheses, and for citations
+    whose volume is a year or that have a "year" group, in which case those
+    groups hold that year instead.
+
+    citations_per_document is the inclusive range of citations to put in
+    each document. sources, jurisdictions and cite_types restrict which
+    citations are generated, as in get_regexes. The same arguments always
+    produce the same documents.
+    """
+    rng = random.Random(seed)
+    regexes = get_regexes(sources, jurisdictions, cite_types)
+    if not regexes:
+        raise ValueError("No regexes match the requested filters")
+    # Maps each CitationRegex to its parse tree and, if its volume is a
+    # year, the years in its date range that the volume can match. None
+    # marks regexes that can't be sampled.
+    prepared = {}
+    for doc_id in range(documents):
+        text = []
+        offset = 0
+        citations = []
+        for _ in range(rng.randint(*citations_per_document)):
+            citation_regex = rng.choice(regexes)
+            if citation_regex not in prepared:
+                prepared[citation_regex] = prepare(citation_regex)
+            if prepared[citation_regex] is None:
+                continue
+            parsed, year_groups, years = prepared[citation_regex]
+
+            year = None
+            overrides = None
+            if year_groups:
+                year = rng.choice(years)
+                overrides = dict.fromkeys(year_groups, str(year))
+            elif citation_regex.source == "reporters":
+                year = sample_year(citation_regex, rng)
+            try:
+                m = sample_citation(
+                    citation_regex, rng, parsed, overrides=overrides
+                )
+            except ValueError:
+                # Don't try this regex again
+                prepared[citation_regex] = None
+                continue
+            if m is None:
+                continue
+
+            cite = m.group(0)
+            if year is not None and not year_groups:
+                cite_with_year = f"{cite} ({year})"
+            else:
+                cite_with_year = cite
+            sentence = rng.choice(TEMPLATES).format(
+                cite="\0", words=filler(rng)
+            )
+            sentence = sentence[0].upper() + sentence[1:]
+            before, after = sentence.split("\0")
+            start = offset + len(before)
+            citations.append(
+                {
+                    "start": start,
+                    "end": start + len(cite),
+                    "text": cite,
+                    "source": citation_regex.source,
+                    "key": citation_regex.key,
+                    "edition": citation_regex.edition,
+                    "template": citation_regex.template,
+                    "groups": {
+                        k: v for k, v in m.groupdict().items() if v is not None
+                    },
+                    "year": year,
+                }
+            )
+            sentence = before + cite_with_year + after
+            # Pad with a filler sentence between citations
+            sentence += " " + filler(rng).capitalize() + ". "
+            text.append(sentence)
+            offset += len(sentence)
+        yield {
+            "id": doc_id,
+            "text": "".join(text).rstrip(),
+            "citations": citations,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic citation corpus as JSON lines."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument(
+        "--min-citations",
+        type=int,
+        default=1,
+        help="Minimum number of citations per document",
+    )
+    parser.add_argument(
+        "--max-citations",
+        type=int,
+        default=10,
+        help="Maximum number of citations per document",
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        dest="sources",
+        help="Only use this data file (reporters, laws or journals). "
+        "May be repeated.",
+    )
+    parser.add_argument(
+        "--jurisdiction",
+        action="append",
+        dest="jurisdictions",
+        help="Only use entries with this mlz_jurisdiction prefix. "
+        "May be repeated.",
+    )
+    parser.add_argument(
+        "--cite-type",
+        action="append",
+        dest="cite_types",
+        help="Only use entries with this cite_type. May be repeated.",
+    )
+    args = parser.parse_args(argv)
+
+    for document in generate_corpus(
+        seed=args.seed,
+        documents=args.documents,
+        citations_per_document=(args.min_citations, args.max_citations),
+        sources=args.sources,
+        jurisdictions=args.jurisdictions,
+        cite_types=args.cite_types,
+    ):
+        sys.stdout.write(json.dumps(document, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Compare two versions of the data files and report what changed.
+
+This is meant for downstream users who derive indexes from this database
+and want to re-process only the citations affected by an upgrade. Run it
+against two copies of the data directory, e.g. an old release and a new one:
+
+    python -m reporters_db.diff old/reporters_db/data reporters_db/data
+
+The result is JSON with a section for each data file. Entries are
+identified by their key, name and cite_type, so a renamed reporter shows up
+as one removal and one addition. Entries whose expanded regexes changed,
+including through a change to regexes.json, have an "expanded_regexes"
+section, so that only citations of those entries need re-processing.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from reporters_db.patterns import expand_entry
+from reporters_db.utils import process_variables
+
+DATA_FILES = ("reporters", "laws", "journals")
+# Files that must exist in every version of the data directory
+REQUIRED_FILES = ("reporters", "regexes")
+
+# Fields that get their own detailed diff; all others are reported as a
+# plain before/after pair under "fields".
+DETAILED_FIELDS = (
+    "name",
+    "cite_type",
+    "editions",
+    "variations",
+    "regexes",
+    "start",
+    "end",
+)
+
+
+def load_data(data_dir):
+    """Load the data files in data_dir without parsing dates, so that the
+    result stays JSON serializable.
+
+    Raises FileNotFoundError if data_dir doesn't exist or lacks
+    reporters.json or regexes.json, so that a bad path can't be mistaken
+    for a version with everything removed. A missing laws.json or
+    journals.json is treated as empty, since older versions don't have
+    them.
+    """
+    if not os.path.isdir(data_dir):
+        raise FileNotFoundError(f"No such data directory: {data_dir}")
+    data = {}
+    for name in DATA_FILES + ("regexes",):
+        path = os.path.join(data_dir, f"{name}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                data[name] = json.load(f)
+        except FileNotFoundError:
+            if name in REQUIRED_FILES:
+                raise FileNotFoundError(
+                    f"No {name}.json in data directory: {data_dir}"
+                ) from None
+            data[name] = {}
+    return data
+
+
+def diff_lists(old, new):
+    """Report the items added to and removed from a list."""
+    out = {}
+    added = [x for x in new if x not in old]
+    removed = [x for x in old if x not in new]
+    if added:
+        out["added"] = added
+    if removed:
+        out["removed"] = removed
+    return out
+
+
+def diff_dicts(old, new):
+    """Report the keys added, removed and changed between two dicts."""
+    out = {}
+    added = {k: v for k, v in new.items() if k not in old}
+    removed = {k: v for k, v in old.items() if k not in new}
+    changed = {
+        k: {"old": v, "new": new[k]}
+        for k, v in old.items()
+        if k in new and new[k] != v
+    }
+    if added:
+        out["added"] = added
+    if removed:
+        out["removed"] = removed
+    if changed:
+        out["changed"] = changed
+    return out
+
+
+def diff_dates(old, new):
+    """Report changes to the start and end dates of an edition or entry."""
+    return {
+        k: {"old": old.get(k), "new": new.get(k)}
+        for k in ("start", "end")
+        if old.get(k) != new.get(k)
+    }
+
+
+def diff_editions(old, new):
+    """Report editions added, removed, or with changed dates or regexes."""
+    out = {}
+    added = {k: v for k, v in new.items() if k not in old}
+    removed = {k: v for k, v in old.items() if k not in new}
+    changed = {}
+    for edition, old_edition in old.items():
+        if edition not in new:
+            continue
+        new_edition = new[edition]
+        edition_diff = {}
+        dates = diff_dates(old_edition, new_edition)
+        if dates:
+            edition_diff["dates"] = dates
+        regexes = diff_lists(
+            old_edition.get("regexes", []), new_edition.get("regexes", [])
+        )
+        if regexes:
+            edition_diff["regexes"] = regexes
+        if edition_diff:
+            changed[edition] = edition_diff
+    if added:
+        out["added"] = added
+    if removed:
+        out["removed"] = removed
+    if changed:
+        out["changed"] = changed
+    return out
+
+
+def expanded_regexes(key, entry, variables):
+    """Map each edition of an entry to its list of expanded regexes."""
+    out = {}
+    for edition, _template, regex, _start, _end in expand_entry(
+        key, entry, variables
+    ):
+        out.setdefault(edition, []).append(regex)
+    return out
+
+
+def diff_expanded_regexes(key, old, new, old_variables, new_variables):
+    """Report the expanded regexes added and removed for each edition that
+    exists in both versions of an entry. This catches changes to the
+    templates, to the variations and to regexes.json alike.
+    """
+    old_regexes = expanded_regexes(key, old, old_variables)
+    new_regexes = expanded_regexes(key, new, new_variables)
+    out = {}
+    for edition, regexes in old_regexes.items():
+        if edition not in new_regexes:
+            continue
+        regexes_diff = diff_lists(regexes, new_regexes[edition])
+        if regexes_diff:
+            out[edition] = regexes_diff
+    return out
+
+
+def diff_entry(key, old, new, old_variables, new_variables):
+    """Report the differences between two versions of a single reporter,
+    law or journal entry. old_variables and new_variables are the processed
+    regexes.json of each version. Returns an empty dict if nothing changed.
+    """
+    out = {}
+    if "editions" in old or "editions" in new:
+        editions = diff_editions(
+            old.get("editions", {}), new.get("editions", {})
+        )
+        if editions:
+            out["editions"] = editions
+
+    old_variations = old.get("variations", [])
+    new_variations = new.get("variations", [])
+    if isinstance(old_variations, dict) or isinstance(new_variations, dict):
+        variations = diff_dicts(old_variations or {}, new_variations or {})
+    else:
+        variations = diff_lists(old_variations, new_variations)
+    if variations:
+        out["variations"] = variations
+
+    regexes = diff_lists(old.get("regexes", []), new.get("regexes", []))
+    if regexes:
+        out["regexes"] = regexes
+
+    expanded = diff_expanded_regexes(
+        key, old, new, old_variables, new_variables
+    )
+    if expanded:
+        out["expanded_regexes"] = expanded
+
+    dates = diff_dates(old, new)
+    if dates:
+        out["dates"] = dates
+
+    fields = {
+        k: {"old": old.get(k), "new": new.get(k)}
+        for k in sorted(set(old) | set(new))
+        if k not in DETAILED_FIELDS and old.get(k) != new.get(k)
+    }
+    if fields:
+        out["fields"] = fields
+    return out
+
+
+def index_entries(data):
+    """Map (key, name, cite_type) to each entry in a reporters, laws or
+    journals dict. The name alone isn't enough, since e.g. "Ark." has a
+    state and a neutral "Arkansas Reports".
+    """
+    entries = {}
+    for key, entry_list in data.items():
+        for entry in entry_list:
+            entries[(key, entry["name"], entry["cite_type"])] = entry
+    return entries
+
+
+def describe(ident):
+    """Turn an index_entries key into a dict for the diff output."""
+    key, name, cite_type = ident
+    return {"key": key, "name": name, "cite_type": cite_type}
+
+
+def diff_source(old, new, old_variables, new_variables):
+    """Report the entries added, removed and changed in one data file."""
+    old_entries = index_entries(old)
+    new_entries = index_entries(new)
+    out = {"added": [], "removed": [], "changed": []}
+    for ident, entry in new_entries.items():
+        if ident not in old_entries:
+            out["added"].append({**describe(ident), "entry": entry})
+    for ident, entry in old_entries.items():
+        if ident not in new_entries:
+            out["removed"].append({**describe(ident), "entry": entry})
+            continue
+        entry_diff = diff_entry(
+            ident[0], entry, new_entries[ident], old_variables, new_variables
+        )
+        if entry_diff:
+            out["changed"].append({**describe(ident), **entry_diff})
+    return out
+
+
+def diff_regex_variables(old, new):
+    """Report changes to the expanded placeholders in regexes.json.
+
+    A change here changes the expanded regex of every template that uses
+    the placeholder, even if the template itself is unchanged. The
+    _optional variants are derived from the others, so they're left out.
+    """
+
+    def expand(variables):
+        if not variables:
+            return {}
+        return {
+            k: v
+            for k, v in process_variables(variables).items()
+            if not k.endswith("_optional")
+        }
+
+    return diff_dicts(expand(old), expand(new))
+
+
+def diff_data(old, new):
+    """Compare two versions of the database as returned by load_data.
+
+    The result takes the form of:
+        {
+         "reporters": {"added": [...], "removed": [...], "changed": [...]},
+         "laws": {...},
+         "journals": {...},
+         "regex_variables": {"added": {...}, "removed": {...}, "changed": {...}},
+        }
+
+    Each "changed" item has the key, name and cite_type of the entry, plus
+    sections for whatever changed: "editions", "variations", "regexes",
+    "expanded_regexes", "dates" and "fields". Sections with no changes are
+    left out. "expanded_regexes" maps each edition to the fully expanded
+    regexes added and removed, and is the section to use for deciding
+    which citations to re-process.
+    """
+    old_variables = process_variables(old.get("regexes", {}))
+    new_variables = process_variables(new.get("regexes", {}))
+    out = {
+        name: diff_source(
+            old.get(name, {}), new.get(name, {}), old_variables, new_variables
+        )
+        for name in DATA_FILES
+    }
+    out["regex_variables"] = diff_regex_variables(
+        old.get("regexes", {}), new.get("regexes", {})
+    )
+    return out
+
+
+def diff_dirs(old_dir, new_dir):
+    """Compare the data files in two directories."""
+    return diff_data(load_data(old_dir), load_data(new_dir))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare two versions of the reporters-db data files."
+    )
+    parser.add_argument("old", help="Directory with the old data files")
+    parser.add_argument("new", help="Directory with the new data files")
+    args = parser.parse_args(argv)
+
+    try:
+        delta = diff_dirs(args.old, args.new)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    json.dump(
+        delta,
+        sys.stdout,
+        indent=4,
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
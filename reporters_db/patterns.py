@@ -0,0 +1,289 @@
+"""Build regex sets for a subset of the database, compiled on demand.
+
+Expanding and compiling the patterns for every entry in reporters.json,
+laws.json and journals.json is slow and uses a lot of memory. The functions
+here let you ask for only the part of the database you care about, e.g.:
+
+    >>> from reporters_db.patterns import get_regexes
+    >>> regexes = get_regexes(jurisdictions="us:tx")
+    >>> regexes = get_regexes(sources=["reporters"], cite_types=["federal"])
+
+Each distinct combination of filters is expanded and compiled the first time
+it is requested and cached separately after that.
+"""
+
+import re
+from collections import namedtuple
+from functools import cache
+from string import Template
+
+from reporters_db import JOURNALS, LAWS, REGEX_VARIABLES, REPORTERS
+from reporters_db.utils import recursive_substitute
+
+SOURCES = {
+    "reporters": REPORTERS,
+    "laws": LAWS,
+    "journals": JOURNALS,
+}
+
+# mlz_jurisdiction codes for the jurisdiction names used in laws.json, so
+# that laws can be filtered with the same prefixes as reporters. Navajo
+# Nation has no code and never matches a jurisdiction filter.
+LAW_JURISDICTIONS = {
+    "United States": "us",
+    "Alabama": "us:al",
+    "Alaska": "us:ak",
+    "American Samoa": "us:as",
+    "Arizona": "us:az",
+    "Arkansas": "us:ar",
+    "California": "us:ca",
+    "Canal Zone": "us:cz",
+    "Colorado": "us:co",
+    "Connecticut": "us:ct",
+    "Delaware": "us:de",
+    "District of Columbia": "us:dc",
+    "Florida": "us:fl",
+    "Georgia": "us:ga",
+    "Guam": "us:gu",
+    "Hawaii": "us:hi",
+    "Idaho": "us:id",
+    "Illinois": "us:il",
+    "Indiana": "us:in",
+    "Iowa": "us:ia",
+    "Kansas": "us:ks",
+    "Kentucky": "us:ky",
+    "Louisiana": "us:la",
+    "Maine": "us:me",
+    "Maryland": "us:md",
+    "Massachusetts": "us:ma",
+    "Michigan": "us:mi",
+    "Minnesota": "us:mn",
+    "Mississippi": "us:ms",
+    "Missouri": "us:mo",
+    "Montana": "us:mt",
+    "Nebraska": "us:ne",
+    "Nevada": "us:nv",
+    "New Hampshire": "us:nh",
+    "New Jersey": "us:nj",
+    "New Mexico": "us:nm",
+    "New York": "us:ny",
+    "North Carolina": "us:nc",
+    "North Dakota": "us:nd",
+    "Northern Mariana Islands": "us:mp",
+    "Ohio": "us:oh",
+    "Oklahoma": "us:ok",
+    "Oregon": "us:or",
+    "Pennsylvania": "us:pa",
+    "Puerto Rico": "us:pr",
+    "Rhode Island": "us:ri",
+    "South Carolina": "us:sc",
+    "South Dakota": "us:sd",
+    "Tennessee": "us:tn",
+    "Texas": "us:tx",
+    "Utah": "us:ut",
+    "Vermont": "us:vt",
+    "Virgin Islands": "us:vi",
+    "Virginia": "us:va",
+    "Washington": "us:wa",
+    "West Virginia": "us:wv",
+    "Wisconsin": "us:wi",
+    "Wyoming": "us:wy",
+}
+
+# Used for editions and journals that don't provide custom regexes
+DEFAULT_REGEX = "$full_cite"
+
+CITE_TYPES = frozenset(
+    entry["cite_type"]
+    for data in SOURCES.values()
+    for entries in data.values()
+    for entry in entries
+)
+
+# The top-level components of mlz_jurisdiction values, like "us"
+JURISDICTION_ROOTS = frozenset(
+    re.split("[:;]", jurisdiction)[0]
+    for entries in REPORTERS.values()
+    for entry in entries
+    for jurisdiction in entry["mlz_jurisdiction"]
+)
+
+CitationRegex = namedtuple(
+    "CitationRegex",
+    [
+        "source",
+        "key",
+        "edition",
+        "template",
+        "regex",
+        "start",
+        "end",
+        "cite_type",
+    ],
+)
+CitationRegex.__doc__ = """A single expanded regex from the database.
+
+source is one of the keys in SOURCES, key is the top-level key of the
+entry in that file, edition is the edition (for reporters) or the key
+(for laws and journals) that the regex matches, template is the regex as
+written in the data file, and regex is the fully expanded regex -- a
+string from iter_regexes, or a compiled pattern from get_regexes. start
+and end are the dates of the edition (for reporters) or of the entry (for
+laws and journals), and cite_type is the cite_type of the entry.
+"""
+
+
+def jurisdiction_matches(jurisdiction, prefix):
+    """Does an mlz_jurisdiction value start with the given prefix?
+
+    Prefixes only match whole components, so "us:c1" matches
+    "us:c1;court.appeals" but not "us:c11;court.appeals".
+    """
+    if not jurisdiction.startswith(prefix):
+        return False
+    if len(jurisdiction) == len(prefix) or prefix[-1] in ":;":
+        return True
+    return jurisdiction[len(prefix)] in ":;"
+
+
+def entry_matches(entry, jurisdictions=None, cite_types=None):
+    """Does a reporter, law or journal entry pass the given filters?
+
+    jurisdictions are mlz_jurisdiction prefixes. A reporter matches if any
+    of its mlz_jurisdiction values match. A law's jurisdiction name is
+    looked up in LAW_JURISDICTIONS and treated as a jurisdiction without a
+    court, so "us:tx" and "us:tx;" match Texas laws, and "us;" matches
+    federal laws but not state ones. Journals have no jurisdiction and
+    never match a jurisdiction filter.
+    """
+    if cite_types is not None and entry["cite_type"] not in cite_types:
+        return False
+    if jurisdictions is None:
+        return True
+    entry_jurisdictions = list(entry.get("mlz_jurisdiction", []))
+    if entry.get("jurisdiction") in LAW_JURISDICTIONS:
+        entry_jurisdictions.append(
+            LAW_JURISDICTIONS[entry["jurisdiction"]] + ";"
+        )
+    return any(
+        jurisdiction_matches(jurisdiction, prefix)
+        for prefix in jurisdictions
+        for jurisdiction in entry_jurisdictions
+    )
+
+
+def expand_regex(regex_template, edition_strings, variables=REGEX_VARIABLES):
+    """Expand regexes.json placeholders and insert the edition strings.
+
+    variables are the processed contents of regexes.json, defaulting to
+    the ones shipped with this package.
+    """
+    regex = recursive_substitute(regex_template, variables)
+    return Template(regex).safe_substitute(
+        edition=f"(?:{'|'.join(re.escape(e) for e in edition_strings)})"
+    )
+
+
+def expand_entry(key, entry, variables=REGEX_VARIABLES):
+    """Yield (edition, template, regex, start, end) for every regex of a
+    reporter, law or journal entry, expanded with the given variables.
+
+    Reporters yield each of their editions; laws and journals use their key
+    as the edition. Templates default to DEFAULT_REGEX when none are given.
+    """
+    if "editions" in entry:
+        for edition, edition_data in entry["editions"].items():
+            edition_strings = [edition] + [
+                k for k, v in entry["variations"].items() if v == edition
+            ]
+            for template in edition_data.get("regexes") or [DEFAULT_REGEX]:
+                yield (
+                    edition,
+                    template,
+                    expand_regex(template, edition_strings, variables),
+                    edition_data["start"],
+                    edition_data["end"],
+                )
+    else:
+        edition_strings = [key] + entry["variations"]
+        for template in entry.get("regexes") or [DEFAULT_REGEX]:
+            yield (
+                key,
+                template,
+                expand_regex(template, edition_strings, variables),
+                entry["start"],
+                entry["end"],
+            )
+
+
+def iter_regexes(sources=None, jurisdictions=None, cite_types=None):
+    """Yield a CitationRegex with an uncompiled regex for every pattern
+    in the requested part of the database.
+
+    sources is an iterable of keys from SOURCES, defaulting to all of them.
+    jurisdictions and cite_types are described in entry_matches; None
+    means no filtering. Raises ValueError for unknown sources or cite
+    types, and for jurisdiction prefixes that don't start with a known mlz
+    root like "us" (e.g. a state name like "Texas", or an empty string).
+    """
+    for cite_type in cite_types or []:
+        if cite_type not in CITE_TYPES:
+            raise ValueError(
+                f"Unknown cite_type {cite_type!r}, expected one of "
+                f"{sorted(CITE_TYPES)}"
+            )
+    for prefix in jurisdictions or []:
+        if re.split("[:;]", prefix)[0] not in JURISDICTION_ROOTS:
+            raise ValueError(
+                f"Jurisdiction {prefix!r} isn't an mlz_jurisdiction prefix, "
+                f"expected one starting with {sorted(JURISDICTION_ROOTS)}"
+            )
+    if sources is None:
+        sources = SOURCES.keys()
+    for source in sources:
+        try:
+            data = SOURCES[source]
+        except KeyError:
+            raise ValueError(
+                f"Unknown source {source!r}, expected one of {list(SOURCES)}"
+            ) from None
+        for key, entries in data.items():
+            for entry in entries:
+                if not entry_matches(entry, jurisdictions, cite_types):
+                    continue
+                for expanded in expand_entry(key, entry):
+                    yield CitationRegex(
+                        source, key, *expanded, entry["cite_type"]
+                    )
+
+
+@cache
+def _get_regexes(sources, jurisdictions, cite_types):
+    return tuple(
+        r._replace(regex=re.compile(r.regex))
+        for r in iter_regexes(sources, jurisdictions, cite_types)
+    )
+
+
+def _normalize(values):
+    """Turn a filter argument into a hashable, order-independent key."""
+    if values is None:
+        return None
+    if isinstance(values, str):
+        values = [values]
+    return tuple(sorted(set(values)))
+
+
+def get_regexes(sources=None, jurisdictions=None, cite_types=None):
+    """Return a tuple of CitationRegex with compiled regexes for the
+    requested part of the database.
+
+    Arguments are the same as for iter_regexes, and may be a single string
+    or an iterable of strings. Each combination of arguments is compiled
+    the first time it is requested and cached for later calls.
+    """
+    return _get_regexes(
+        _normalize(sources),
+        _normalize(jurisdictions),
+        _normalize(cite_types),
+    )
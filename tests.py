@@ -1,3 +1,4 @@
+import copy
 import datetime
 import json
 import os
@@ -6,6 +7,7 @@ from difflib import context_diff
 from pathlib import Path
 from string import Template
 from unittest import TestCase
+from unittest.mock import patch
 
 import jsonschema
 
@@ -18,6 +20,9 @@ from reporters_db import (
     REPORTERS,
     VARIATIONS_ONLY,
 )
+from reporters_db.corpus import generate_corpus
+from reporters_db.diff import diff_data, diff_dirs, load_data, main
+from reporters_db.patterns import get_regexes, jurisdiction_matches
 from reporters_db.utils import recursive_substitute
 
 VALID_CITE_TYPES = (
@@ -399,6 +404,282 @@ class JournalsTest(BaseTestCase):
         self.check_whitespace(JOURNALS)
 
 
+class PatternsTest(TestCase):
+    """Tests for partitioned regex sets in reporters_db.patterns"""
+
+    def test_jurisdiction_prefixes(self):
+        """Do prefixes only match whole mlz_jurisdiction components?"""
+        self.assertTrue(jurisdiction_matches("us:c1;court.appeals", "us:c1"))
+        self.assertFalse(jurisdiction_matches("us:c11;court.appeals", "us:c1"))
+        self.assertTrue(jurisdiction_matches("us;supreme.court", "us;"))
+        self.assertFalse(jurisdiction_matches("us:ny;supreme.court", "us;"))
+        self.assertTrue(jurisdiction_matches("us:ny;supreme.court", "us"))
+
+    def test_partition_filters(self):
+        """Do filters restrict the regex set to matching entries?"""
+        regexes = get_regexes(jurisdictions="us:tx")
+        self.assertEqual({"reporters", "laws"}, {r.source for r in regexes})
+        self.assertIn("Tex. Admin. Code", {r.key for r in regexes})
+        for r in regexes:
+            entries = (
+                REPORTERS[r.key] if r.source == "reporters" else LAWS[r.key]
+            )
+            self.assertTrue(
+                any(
+                    e.get("jurisdiction") == "Texas"
+                    or any(
+                        j.startswith("us:tx;")
+                        for j in e.get("mlz_jurisdiction", [])
+                    )
+                    for e in entries
+                ),
+                f"{r.key} is not a Texas entry",
+            )
+
+        regexes = get_regexes(sources="reporters", cite_types="federal")
+        self.assertIn("F.3d", {r.edition for r in regexes})
+        self.assertNotIn("A.2d", {r.edition for r in regexes})
+        self.assertEqual(
+            (), get_regexes(sources="journals", jurisdictions="us:tx")
+        )
+
+        federal_laws = {
+            r.key for r in get_regexes(sources="laws", jurisdictions="us;")
+        }
+        self.assertIn("U.S.C.", federal_laws)
+        self.assertNotIn("Tex. Admin. Code", federal_laws)
+
+    def test_partition_cache(self):
+        """Is each partition compiled once and reused regardless of order?"""
+        regexes = get_regexes(cite_types=["neutral", "state"])
+        self.assertIs(regexes, get_regexes(cite_types=("state", "neutral")))
+        self.assertIsInstance(regexes[0].regex, re.Pattern)
+        self.assertIsNot(regexes, get_regexes(cite_types="state"))
+
+    def test_bad_filters(self):
+        """Are unknown sources and cite types and empty prefixes rejected?"""
+        with self.assertRaises(ValueError):
+            get_regexes(sources="statutes")
+        with self.assertRaises(ValueError):
+            get_regexes(cite_types="Federal")
+        with self.assertRaises(ValueError):
+            get_regexes(jurisdictions="")
+        with self.assertRaises(ValueError):
+            get_regexes(jurisdictions="Texas")
+
+    def test_matches_examples(self):
+        """Does a partition still match its reporters' examples?"""
+        regexes = get_regexes(sources="reporters", jurisdictions="us:oh")
+        for reporter_abbv, _reporter_list, reporter_data in iter_reporters():
+            if not any(
+                jurisdiction_matches(j, "us:oh")
+                for j in reporter_data["mlz_jurisdiction"]
+            ):
+                continue
+            for example in reporter_data.get("examples", []):
+                self.assertTrue(
+                    any(r.regex.fullmatch(example) for r in regexes),
+                    f"No regex for {reporter_abbv} matched {example!r}",
+                )
+
+
+class DiffTest(TestCase):
+    """Tests for comparing versions of the data files in reporters_db.diff"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.data = load_data(Path(__file__).parent / "reporters_db" / "data")
+
+    def test_no_changes(self):
+        """Does comparing the data to itself report nothing?"""
+        delta = diff_data(self.data, self.data)
+        for name in ("reporters", "laws", "journals"):
+            self.assertEqual(
+                {"added": [], "removed": [], "changed": []}, delta[name]
+            )
+        self.assertEqual({}, delta["regex_variables"])
+
+    def test_changes(self):
+        """Are added, removed and changed entries reported?"""
+        new = copy.deepcopy(self.data)
+        atlantic = new["reporters"]["A."][0]
+        atlantic["editions"]["A.3d"]["end"] = "2030-12-31T00:00:00"
+        atlantic["editions"]["A.4th"] = {
+            "end": None,
+            "regexes": ["$full_cite"],
+            "start": "2030-01-01T00:00:00",
+        }
+        del atlantic["variations"]["A2d"]
+        atlantic["variations"]["A.4th."] = "A.4th"
+        [removed_entry] = new["reporters"].pop("F.R.D.")
+        new["laws"]["ASBCA"][0]["regexes"].append("$reporter (?P<page>\\d+)")
+        new["journals"]["A.B.A. J."][0]["notes"] = "Checked by hand."
+        new["regexes"]["page"]["3_4"] = "(?P<page>\\d{3,5})"
+
+        delta = diff_data(self.data, new)
+        [removed] = delta["reporters"]["removed"]
+        self.assertEqual(
+            ("F.R.D.", removed_entry), (removed["key"], removed["entry"])
+        )
+        self.assertEqual([], delta["reporters"]["added"])
+        changed_reporters = {
+            c["key"]: c for c in delta["reporters"]["changed"]
+        }
+        self.assertEqual(
+            {"A.", "NMCA", "NMCERT", "NMSC"}, set(changed_reporters)
+        )
+        changed = changed_reporters["A."]
+        self.assertEqual(["A.4th"], list(changed["editions"]["added"]))
+        self.assertEqual(
+            {"end": {"old": None, "new": "2030-12-31T00:00:00"}},
+            changed["editions"]["changed"]["A.3d"]["dates"],
+        )
+        self.assertEqual(
+            {"added": {"A.4th.": "A.4th"}, "removed": {"A2d": "A.2d"}},
+            changed["variations"],
+        )
+        # Removing a variation changes the A.2d regex, but not A.'s
+        self.assertEqual(["A.2d"], list(changed["expanded_regexes"]))
+        self.assertEqual(
+            {"added": ["$reporter (?P<page>\\d+)"]},
+            delta["laws"]["changed"][0]["regexes"],
+        )
+        self.assertEqual(
+            {
+                "notes": {
+                    "old": "Automatically generated.",
+                    "new": "Checked by hand.",
+                }
+            },
+            delta["journals"]["changed"][0]["fields"],
+        )
+        self.assertIn("page_3_4", delta["regex_variables"]["changed"])
+        self.assertIn(
+            "full_cite_format_neutral_3_4",
+            delta["regex_variables"]["changed"],
+        )
+        # Reporters using the changed placeholder are reported as changed
+        # even though their own templates didn't change.
+        nmsc = changed_reporters["NMSC"]
+        self.assertEqual(
+            ["expanded_regexes"],
+            [k for k in nmsc if k not in ("key", "name", "cite_type")],
+        )
+        self.assertIn(
+            "(?P<page>\\d{3,5})",
+            nmsc["expanded_regexes"]["NMSC"]["added"][0],
+        )
+        json.dumps(delta)
+
+    def test_bad_paths(self):
+        """Are missing directories and data files errors, not removals?"""
+        data_dir = Path(__file__).parent / "reporters_db" / "data"
+        with self.assertRaises(FileNotFoundError):
+            diff_dirs(data_dir, data_dir / "nonexistent")
+        with self.assertRaises(FileNotFoundError):
+            diff_dirs(data_dir.parent, data_dir)
+        with self.assertRaises(SystemExit) as cm, patch("sys.stderr"):
+            main([str(data_dir), str(data_dir / "nonexistent")])
+        self.assertNotEqual(0, cm.exception.code)
+
+
+class CorpusTest(TestCase):
+    """Tests for the synthetic corpus generator in reporters_db.corpus"""
+
+    def test_reproducible(self):
+        """Does the same seed always give the same corpus?"""
+        first = list(generate_corpus(seed=42, documents=20))
+        self.assertEqual(first, list(generate_corpus(seed=42, documents=20)))
+        self.assertNotEqual(
+            first, list(generate_corpus(seed=43, documents=20))
+        )
+
+    def test_annotations(self):
+        """Do annotations point at citations matching the right regex?"""
+        regexes = {}
+        for r in get_regexes(sources="reporters", jurisdictions="us:ca"):
+            regexes.setdefault((r.key, r.edition), []).append(r)
+        corpus = generate_corpus(
+            seed=1,
+            documents=50,
+            sources="reporters",
+            jurisdictions="us:ca",
+        )
+        for document in corpus:
+            self.assertTrue(document["citations"])
+            for citation in document["citations"]:
+                text = citation["text"]
+                self.assertEqual(
+                    text,
+                    document["text"][citation["start"] : citation["end"]],
+                )
+                candidates = regexes[(citation["key"], citation["edition"])]
+                self.assertTrue(
+                    any(r.regex.fullmatch(text) for r in candidates),
+                    f"{text!r} doesn't match {citation['edition']}",
+                )
+                r = candidates[0]
+                if r.start is not None:
+                    self.assertLessEqual(r.start.year, citation["year"])
+                if r.end is not None:
+                    self.assertLessEqual(citation["year"], r.end.year)
+
+    def test_year_volumes(self):
+        """Do citations whose volume is a year agree with their year?"""
+        regexes = {}
+        for r in get_regexes(cite_types="neutral"):
+            regexes.setdefault((r.key, r.edition), []).append(r)
+        for document in generate_corpus(
+            seed=3, documents=50, cite_types="neutral"
+        ):
+            for citation in document["citations"]:
+                self.assertEqual(
+                    str(citation["year"]), citation["groups"]["volume"]
+                )
+                # No contradicting year parenthetical after the citation
+                self.assertIsNone(
+                    re.match(
+                        r" \(\d{4}\)", document["text"][citation["end"] :]
+                    )
+                )
+                r = regexes[(citation["key"], citation["edition"])][0]
+                if r.start is not None:
+                    self.assertLessEqual(r.start.year, citation["year"])
+                if r.end is not None:
+                    self.assertLessEqual(citation["year"], r.end.year)
+
+    def test_year_groups(self):
+        """Do citations with their own year group agree with their year?"""
+        regexes = {}
+        for r in get_regexes():
+            regexes.setdefault((r.key, r.edition), []).append(r)
+        seen = 0
+        for document in generate_corpus(seed=5, documents=300):
+            for citation in document["citations"]:
+                if "year" not in citation["groups"]:
+                    continue
+                seen += 1
+                self.assertEqual(
+                    str(citation["year"]), citation["groups"]["year"]
+                )
+                # No second year parenthetical after the citation
+                self.assertIsNone(
+                    re.match(
+                        r" \(\d{4}\)", document["text"][citation["end"] :]
+                    )
+                )
+                r = regexes[(citation["key"], citation["edition"])][0]
+                if r.start is not None:
+                    self.assertLessEqual(r.start.year, citation["year"])
+                if r.end is not None:
+                    self.assertLessEqual(citation["year"], r.end.year)
+        self.assertTrue(seen)
+
+    def test_no_regexes(self):
+        with self.assertRaises(ValueError):
+            next(generate_corpus(sources="journals", jurisdictions="us:ca"))
+
+
 # avoid running test methods in BaseTestCase itself
 del BaseTestCase
 